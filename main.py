@@ -1,7 +1,7 @@
 import os
 import time
-import csv
 import threading
+import collections
 from datetime import datetime
 
 # platform / Android cache handling
@@ -27,11 +27,6 @@ from kivymd.uix.label import MDLabel
 from kivymd.utils.set_bars_colors import set_bars_colors
 # --- Refactored UI Imports ---
 # Import modern KivyMD components based on the reference code
-from kivymd.uix.list import (
-    MDListItem,
-    MDListItemHeadlineText,
-    MDListItemSupportingText,
-)
 from kivymd.uix.appbar import (
     MDTopAppBar,
     MDTopAppBarLeadingButtonContainer,
@@ -43,126 +38,18 @@ from kivymd.uix.button import MDButton, MDButtonText
 from kivymd.uix.card import MDCard
 from kivymd.uix.divider import MDDivider
 from kivymd.uix.scrollview import MDScrollView
-from kivymd.uix.list import MDList
 from kivymd.uix.boxlayout import MDBoxLayout
 
 
-# Try PyJNIus for Android memory APIs; fallback to /proc parsing
-try:
-    from jnius import autoclass
-    _HAS_JNIUS = True
-except Exception:
-    _HAS_JNIUS = False
-
-import os as _os
-
-# ------------------ Memory helpers ------------------
-def get_pid():
-    """Get the current process ID."""
-    try:
-        if _HAS_JNIUS:
-            Process = autoclass('android.os.Process')
-            return int(Process.myPid())
-    except Exception:
-        pass
-    return _os.getpid()
-
-def read_proc_meminfo():
-    """Read /proc/meminfo for system memory details."""
-    out = {}
-    try:
-        with open('/proc/meminfo', 'r') as f:
-            for line in f:
-                k, v = line.split(':', 1)
-                out[k.strip()] = int(v.strip().split()[0])
-    except Exception:
-        pass
-    return out
-
-def read_proc_status(pid):
-    """Read /proc/{pid}/status for process memory details."""
-    path = f'/proc/{pid}/status'
-    res = {}
-    try:
-        with open(path, 'r') as f:
-            for line in f:
-                if line.startswith(('VmRSS:', 'VmSize:', 'VmPeak:')):
-                    k, v = line.split(':', 1)
-                    res[k.strip()] = int(v.strip().split()[0])
-    except Exception:
-        pass
-    return res
-
-def get_memory_info_jnius(pid):
-    """Get detailed memory info on Android using JNIus."""
-    try:
-        PythonActivity = autoclass('org.kivy.android.PythonActivity')
-        Context = autoclass('android.content.Context')
-        ActivityManager = autoclass('android.app.ActivityManager')
-
-        activity = PythonActivity.mActivity
-        am = activity.getSystemService(Context.ACTIVITY_SERVICE)
-        mi = ActivityManager.MemoryInfo()
-        am.getMemoryInfo(mi)
-
-        pinfo = am.getProcessMemoryInfo([int(pid)])[0]
-        return {
-            'totalMem_kb': int(mi.totalMem / 1024),
-            'availMem_kb': int(mi.availMem / 1024),
-            'lowMemory': bool(mi.lowMemory),
-            'pss_kb': int(pinfo.getTotalPss()),
-            'private_dirty_kb': int(pinfo.getTotalPrivateDirty())
-        }
-    except Exception:
-        return None
-
-def get_memory_snapshot(pid):
-    """Get a snapshot of memory usage, using JNIus if available."""
-    if _HAS_JNIUS:
-        jinfo = get_memory_info_jnius(pid)
-        if jinfo:
-            return jinfo
-    sysinfo = read_proc_meminfo()
-    procinfo = read_proc_status(pid)
-    return {
-        'totalMem_kb': sysinfo.get('MemTotal', -1),
-        'availMem_kb': sysinfo.get('MemAvailable', sysinfo.get('MemFree', -1)),
-        'lowMemory': False,
-        'pss_kb': procinfo.get('VmRSS', -1),
-        'private_dirty_kb': -1
-    }
-
-def kb_to_mb(kb):
-    """Convert kilobytes to megabytes."""
-    try:
-        return kb / 1024.0
-    except Exception:
-        return -1.0
-
-# ------------------ Demo complex operation ------------------
-def demo_complex_operation(stop_event, duration_sec=180):
-    """A function that simulates a memory and CPU intensive task."""
-    end_time = time.time() + duration_sec
-    allocated = []
-    try:
-        while time.time() < end_time and not stop_event.is_set():
-            try:
-                # Allocate memory in chunks
-                for _ in range(6):
-                    # MODIFIED: Changed allocation from 5MB to 100KB
-                    allocated.append(bytearray(100 * 1024)) # 100KB
-                # Release old memory to keep usage fluctuating
-                if len(allocated) > 40:
-                    allocated = allocated[10:]
-            except MemoryError:
-                allocated = []
-            # Simulate CPU work
-            s = 0
-            for i in range(50000):
-                s += (i ^ (i << 1)) & 0xFF
-            time.sleep(0.25)
-    finally:
-        allocated = None
+from mem_utils import (
+    get_pid,
+    get_activity_manager,
+    get_downloads_dir,
+    get_external_files_dir,
+    get_memory_snapshot,
+    detach_thread,
+    demo_complex_operation,
+)
 
 # ------------------ KV Language UI Definition (Refactored) ------------------
 KV = '''
@@ -284,8 +171,12 @@ MDBoxLayout:
 
                 MDScrollView:
                     id: scroll
-                    MDList:
-                        id: log_grid
+                    # A single label holds the whole log so the widget count stays constant
+                    MDLabel:
+                        id: log_label
+                        text: ""
+                        halign: "left"
+                        adaptive_height: True
                         
         MDBoxLayout:
             size_hint_y: None
@@ -297,6 +188,12 @@ MDBoxLayout:
                 halign: "left"
 '''
 
+LOG_MAX_LINES = 50
+LOG_REFRESH_SEC = 0.5
+# One memory sample; fields follow the CSV columns below (sizes in kB)
+Sample = collections.namedtuple('Sample', 'ts pid pss priv total avail low')
+CSV_HEADER = "timestamp,pid,pss_kb,private_dirty_kb,totalMem_kb,availMem_kb,lowMemory\r\n"
+
 # ------------------ App Class ------------------
 class MemMonitorApp(MDApp):
     def __init__(self, **kwargs):
@@ -305,11 +202,20 @@ class MemMonitorApp(MDApp):
         self.theme_cls.theme_style = "Light"
         self.sample_interval = 1.0
         self.duration_sec = 180
+        self._max_samples = int(self.duration_sec / self.sample_interval) + 1
         self.pid = get_pid()
+        self._am, self._mi = get_activity_manager()
+        self._pid_arr = [int(self.pid)]
         self.sampling = False
-        self.samples = []
+        self.samples = collections.deque(maxlen=self._max_samples)
         self.stop_event = threading.Event()
         self.task_thread = None
+        self.sampler_thread = None
+        self._sampler_stop = threading.Event()
+        self._pending = collections.deque()
+        self._log_lines = collections.deque(maxlen=LOG_MAX_LINES)
+        self._log_pending = False
+        self._downloads_dir = self._resolve_downloads_dir()
 
     def build(self):
         """Builds the app from the KV string."""
@@ -359,18 +265,26 @@ class MemMonitorApp(MDApp):
         if self.sampling:
             return
         self.sampling = True
-        self.samples = []
+        self.samples = collections.deque(maxlen=self._max_samples)
         self.stop_event.clear()
         self.root.ids.status_label.text = "Status: running"
         self.root.ids.start_btn.disabled = True
         self.root.ids.stop_btn.disabled = False
-        self.root.ids.log_grid.clear_widgets()
+        self._log_lines.clear()
+        self.root.ids.log_label.text = ""
         self._start_time = time.time()
         
         self.task_thread = threading.Thread(target=demo_complex_operation, args=(self.stop_event, self.duration_sec), daemon=True)
         self.task_thread.start()
-        
-        Clock.schedule_interval(self._sample_tick, self.sample_interval)
+
+        # Sample on a background thread so /proc reads and JNI calls never block
+        # rendering; the UI thread only drains the queued samples.
+        self._sampler_stop = threading.Event()
+        self._pending = collections.deque()
+        self.sampler_thread = threading.Thread(target=self._sampler_loop, args=(self._sampler_stop, self._pending), daemon=True)
+        self.sampler_thread.start()
+
+        Clock.schedule_interval(self._ui_flush, self.sample_interval)
 
     def stop_test(self, finished=False):
         """Stops the memory sampling and the background task."""
@@ -378,7 +292,9 @@ class MemMonitorApp(MDApp):
             return
         self.sampling = False
         self.stop_event.set()
-        Clock.unschedule(self._sample_tick)
+        self._sampler_stop.set()
+        Clock.unschedule(self._ui_flush)
+        self._ui_flush(0)
         
         self.root.ids.status_label.text = "Status: finished" if finished else "Status: stopped"
         self.root.ids.start_btn.disabled = False
@@ -386,48 +302,71 @@ class MemMonitorApp(MDApp):
         
         Clock.schedule_once(lambda dt: self.save_csv(), 0.5)
 
-    def _sample_tick(self, dt):
-        """Called by the clock to take a memory sample. Now uses MDListItem."""
-        if not self.sampling:
+    def _sampler_loop(self, stop_event, pending):
+        """Runs on the sampler thread, queueing a memory sample every interval."""
+        try:
+            while not stop_event.wait(self.sample_interval):
+                ts = time.time()
+                info = get_memory_snapshot(self.pid, self._am, self._mi, self._pid_arr)
+                pending.append(Sample(
+                    ts,
+                    self.pid,
+                    info['pss_kb'],
+                    info['private_dirty_kb'],
+                    info['totalMem_kb'],
+                    info['availMem_kb'],
+                    info['lowMemory']
+                ))
+                # Check if the test duration has elapsed
+                if ts - self._start_time >= self.duration_sec:
+                    break
+        finally:
+            detach_thread()
+            # A sample read while stop_test ran lands after its drain; post one more
+            Clock.schedule_once(self._ui_flush)
+
+    def _ui_flush(self, dt):
+        """Called by the clock to move queued samples into the UI."""
+        while self._pending:
+            sample = self._pending.popleft()
+            self.samples.append(sample)
+            self._show_sample(sample)
+
+        # The sampler thread exits on its own once the test duration has elapsed
+        if self.sampling and not self.sampler_thread.is_alive():
+            self.stop_test(finished=True)
             return False
-            
-        now = datetime.utcnow()
-        info = get_memory_snapshot(self.pid)
-        sample = {
-            'timestamp': now.isoformat(),
-            'pid': self.pid,
-            'pss_kb': info.get('pss_kb', -1),
-            'private_dirty_kb': info.get('private_dirty_kb', -1),
-            'totalMem_kb': info.get('totalMem_kb', -1),
-            'availMem_kb': info.get('availMem_kb', -1),
-            'lowMemory': info.get('lowMemory', False)
-        }
-        self.samples.append(sample)
+        return True
 
+    def _show_sample(self, sample):
+        """Updates the live labels and adds a line to the log."""
         # Update UI labels
-        self.root.ids.pss_label.text = f"PSS: {kb_to_mb(sample['pss_kb']):.2f} MB"
-        self.root.ids.avail_label.text = f"Available RAM: {kb_to_mb(sample['availMem_kb']):.2f} MB"
-        self.root.ids.low_label.text = f"Low memory: {sample['lowMemory']}"
-
-        # Add a new entry to the log using the structured MDListItem
-        headline = f"[{now.strftime('%H:%M:%S')}] PSS: {kb_to_mb(sample['pss_kb']):.1f}MB"
-        supporting = f"Avail: {kb_to_mb(sample['availMem_kb']):.1f}MB | Low Mem: {sample['lowMemory']}"
-        
-        list_item = MDListItem(
-            MDListItemHeadlineText(text=headline),
-            MDListItemSupportingText(text=supporting),
+        self.root.ids.pss_label.text = f"PSS: {sample.pss / 1024.0:.2f} MB"
+        self.root.ids.avail_label.text = f"Available RAM: {sample.avail / 1024.0:.2f} MB"
+        self.root.ids.low_label.text = f"Low memory: {sample.low}"
+
+        # Queue a new log line; the label text is rebuilt at most every LOG_REFRESH_SEC
+        self._log_lines.append(
+            f"[{time.strftime('%H:%M:%S', time.gmtime(sample.ts))}] PSS: {sample.pss / 1024.0:.1f}MB | "
+            f"Avail: {sample.avail / 1024.0:.1f}MB | Low Mem: {sample.low}"
         )
-        self.root.ids.log_grid.add_widget(list_item)
-        
-        # Auto-scroll to the bottom to show the latest log entry
-        Clock.schedule_once(lambda dt, scroll_to=list_item: self.root.ids.scroll.scroll_to(scroll_to), 0.05)
-
-        # Check if the test duration has elapsed
-        elapsed = time.time() - self._start_time
-        if elapsed >= self.duration_sec:
-            self.stop_test(finished=True)
-            return False
-        return True
+        if not self._log_pending:
+            self._log_pending = True
+            Clock.schedule_once(self._refresh_log, LOG_REFRESH_SEC)
+
+    def _refresh_log(self, dt):
+        """Rebuilds the log label from the buffered lines and scrolls to the latest."""
+        self._log_pending = False
+        self.root.ids.log_label.text = '\n'.join(self._log_lines)
+        # Auto-scroll to the bottom once the new text is in place
+        self.root.ids.scroll.scroll_y = 0
+
+    def _resolve_downloads_dir(self):
+        """Looks up the CSV save directory once; None if Downloads is unavailable."""
+        if kivy_platform == 'android':
+            return get_downloads_dir()
+        # For desktop (Windows, macOS, Linux), save to user's Downloads folder
+        return os.path.join(os.path.expanduser('~'), 'Downloads')
 
     def save_csv(self):
         """Saves the collected samples to a CSV file in the public Downloads folder."""
@@ -436,43 +375,34 @@ class MemMonitorApp(MDApp):
             return
 
         def get_save_path():
-            """Helper to determine the correct cross-platform save directory."""
+            """Helper to build the save path, falling back to private storage."""
             filename = f"mem_samples_{int(time.time())}.csv"
-            
-            if kivy_platform == 'android':
-                try:
-                    from jnius import autoclass
-                    # Get the public downloads directory path
-                    Environment = autoclass('android.os.Environment')
-                    downloads_dir = Environment.getExternalStoragePublicDirectory(
-                        Environment.DIRECTORY_DOWNLOADS
-                    ).getAbsolutePath()
-                    
-                    # Ensure the directory exists
-                    os.makedirs(downloads_dir, exist_ok=True)
-                    return os.path.join(downloads_dir, filename)
-                except Exception as e:
-                    print(f"Could not access public Downloads folder: {e}. Falling back to private storage.")
-                    # Fallback to app-specific external storage which is always writable without special permissions
-                    PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                    context = PythonActivity.mActivity
-                    fallback_dir = context.getExternalFilesDir(None).getAbsolutePath()
-                    os.makedirs(fallback_dir, exist_ok=True)
-                    return os.path.join(fallback_dir, filename)
-            else:
-                # For desktop (Windows, macOS, Linux), save to user's Downloads folder
-                home_dir = os.path.expanduser('~')
-                downloads_dir = os.path.join(home_dir, 'Downloads')
-                os.makedirs(downloads_dir, exist_ok=True)
-                return os.path.join(downloads_dir, filename)
+            try:
+                if self._downloads_dir is None:
+                    raise OSError("Downloads directory is unavailable")
+                # Ensure the directory exists
+                os.makedirs(self._downloads_dir, exist_ok=True)
+                return os.path.join(self._downloads_dir, filename)
+            except Exception as e:
+                # App-specific external storage is always writable without special permissions
+                fallback_dir = get_external_files_dir()
+                if fallback_dir is None:
+                    raise
+                print(f"Could not access public Downloads folder: {e}. Falling back to private storage.")
+                os.makedirs(fallback_dir, exist_ok=True)
+                return os.path.join(fallback_dir, filename)
 
         try:
             path = get_save_path()
-            with open(path, 'w', newline='') as csvfile:
-                fieldnames = ['timestamp', 'pid', 'pss_kb', 'private_dirty_kb', 'totalMem_kb', 'availMem_kb', 'lowMemory']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(self.samples)
+            # Format every row (and its timestamp) up front and write the file in one call
+            rows = [CSV_HEADER]
+            rows.extend(
+                f"{datetime.utcfromtimestamp(s.ts).isoformat()},"
+                f"{s.pid},{s.pss},{s.priv},{s.total},{s.avail},{s.low}\r\n"
+                for s in self.samples
+            )
+            with open(path, 'wb') as csvfile:
+                csvfile.write(''.join(rows).encode())
             
             # Update the footer with a more user-friendly message
             self.root.ids.footer_label.text = f"Saved to Downloads"
@@ -0,0 +1,290 @@
+"""Memory sampling helpers and the demo workload for the Memory Monitor app."""
+import os
+import mmap
+import time
+import collections
+
+# Try PyJNIus for Android memory APIs; fallback to /proc parsing
+try:
+    from jnius import autoclass, detach
+    # Resolve the Java classes once; autoclass() walks JNI reflection on every call
+    _PythonActivity = autoclass('org.kivy.android.PythonActivity')
+    _Context = autoclass('android.content.Context')
+    _ActivityManager = autoclass('android.app.ActivityManager')
+    _Process = autoclass('android.os.Process')
+    _Environment = autoclass('android.os.Environment')
+    _HAS_JNIUS = True
+except Exception:
+    _HAS_JNIUS = False
+
+# NumPy is optional; when present the demo's CPU work runs in C with the GIL released
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    _HAS_NUMPY = False
+
+# Numba is optional too; a jitted kernel runs the demo loop natively without the GIL
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except Exception:
+    _HAS_NUMBA = False
+
+# Probe procfs once; the readers below assume their files exist and let
+# errors propagate to get_memory_snapshot
+_HAS_PROC = os.path.exists('/proc/meminfo')
+_HAS_SMAPS_ROLLUP = os.path.exists('/proc/self/smaps_rollup')
+_PAGE_KB = mmap.PAGESIZE // 1024
+
+# ------------------ Memory helpers ------------------
+def get_pid():
+    """Get the current process ID."""
+    if _HAS_JNIUS:
+        return int(_Process.myPid())
+    return os.getpid()
+
+def read_proc_meminfo():
+    """Read /proc/meminfo for system memory details.
+
+    The file is read with a single os.read() so the snapshot is not torn
+    across reads, and parsing stops once the keys used downstream are found.
+    Returns (MemTotal, MemFree, MemAvailable) in kB, with -1 for missing keys.
+    """
+    total = free = avail = -1
+    fd = os.open('/proc/meminfo', os.O_RDONLY)
+    try:
+        data = os.read(fd, 8192)
+    finally:
+        os.close(fd)
+    remaining = 3
+    for line in data.split(b'\n'):
+        if line.startswith(b'MemTotal:'):
+            total = int(line.split()[1])
+        elif line.startswith(b'MemFree:'):
+            free = int(line.split()[1])
+        elif line.startswith(b'MemAvailable:'):
+            avail = int(line.split()[1])
+        else:
+            continue
+        remaining -= 1
+        if not remaining:
+            break
+    return total, free, avail
+
+def read_proc_statm(pid):
+    """Read /proc/{pid}/statm for process memory details (in kB)."""
+    res = {}
+    fd = os.open(f'/proc/{pid}/statm', os.O_RDONLY)
+    try:
+        fields = os.read(fd, 256).split()
+    finally:
+        os.close(fd)
+    res['VmSize'] = int(fields[0]) * _PAGE_KB
+    res['VmRSS'] = int(fields[1]) * _PAGE_KB
+    return res
+
+def read_smaps_rollup(pid):
+    """Read /proc/{pid}/smaps_rollup for PSS and private dirty memory (in kB)."""
+    res = {}
+    fd = os.open(f'/proc/{pid}/smaps_rollup', os.O_RDONLY)
+    try:
+        data = os.read(fd, 4096)
+    finally:
+        os.close(fd)
+    for line in data.split(b'\n'):
+        if line.startswith(b'Pss:'):
+            res['Pss'] = int(line.split()[1])
+        elif line.startswith(b'Private_Dirty:'):
+            res['Private_Dirty'] = int(line.split()[1])
+    return res
+
+def get_activity_manager():
+    """Get the ActivityManager and a reusable MemoryInfo, or (None, None)."""
+    try:
+        if _HAS_JNIUS:
+            activity = _PythonActivity.mActivity
+            am = activity.getSystemService(_Context.ACTIVITY_SERVICE)
+            return am, _ActivityManager.MemoryInfo()
+    except Exception:
+        pass
+    return None, None
+
+def get_downloads_dir():
+    """Get the public Downloads directory on Android, or None."""
+    try:
+        if _HAS_JNIUS:
+            return _Environment.getExternalStoragePublicDirectory(
+                _Environment.DIRECTORY_DOWNLOADS
+            ).getAbsolutePath()
+    except Exception:
+        pass
+    return None
+
+def get_external_files_dir():
+    """Get the app-specific external storage directory on Android, or None."""
+    try:
+        if _HAS_JNIUS:
+            files_dir = _PythonActivity.mActivity.getExternalFilesDir(None)
+            # getExternalFilesDir() returns null when external storage is not mounted
+            if files_dir is not None:
+                return files_dir.getAbsolutePath()
+    except Exception:
+        pass
+    return None
+
+def get_system_memory_jnius(am, mi):
+    """Refresh the cached MemoryInfo in place and read system memory details."""
+    try:
+        am.getMemoryInfo(mi)
+        return {
+            'totalMem_kb': int(mi.totalMem / 1024),
+            'availMem_kb': int(mi.availMem / 1024),
+            'lowMemory': bool(mi.lowMemory)
+        }
+    except Exception:
+        return None
+
+def get_memory_info_jnius(pids, am, mi):
+    """Get detailed memory info on Android using JNIus.
+
+    pids is the [pid] list handed to getProcessMemoryInfo; callers keep one
+    around rather than building it on every call.
+    """
+    try:
+        info = get_system_memory_jnius(am, mi)
+        if info is None:
+            return None
+        pinfo = am.getProcessMemoryInfo(pids)[0]
+        info['pss_kb'] = int(pinfo.getTotalPss())
+        info['private_dirty_kb'] = int(pinfo.getTotalPrivateDirty())
+        return info
+    except Exception:
+        return None
+
+def get_memory_snapshot(pid, am=None, mi=None, pids=None):
+    """Get a snapshot of memory usage, preferring /proc/{pid}/smaps_rollup.
+
+    If an ActivityManager and MemoryInfo are given they are reused for the
+    system-wide figures instead of being looked up on every call; pids is an
+    optional cached [pid] list for the getProcessMemoryInfo fallback.
+    """
+    # Start from "unknown" and fill in whatever can be read, so a failure in
+    # one source does not discard the figures already collected
+    info = {
+        'totalMem_kb': -1,
+        'availMem_kb': -1,
+        'lowMemory': False,
+        'pss_kb': -1,
+        'private_dirty_kb': -1
+    }
+    try:
+        rollup = None
+        if _HAS_SMAPS_ROLLUP:
+            try:
+                rollup = read_smaps_rollup(pid)
+            except OSError:
+                # The file can exist yet be unreadable, e.g. denied by SELinux
+                rollup = None
+        if rollup is None and am is not None:
+            # smaps_rollup is missing or unreadable; fall back to the Binder API
+            jinfo = get_memory_info_jnius(pids or [int(pid)], am, mi)
+            if jinfo:
+                return jinfo
+        sysinfo = get_system_memory_jnius(am, mi) if am is not None else None
+        if sysinfo is None and _HAS_PROC:
+            total_kb, free_kb, avail_kb = read_proc_meminfo()
+            sysinfo = {
+                'totalMem_kb': total_kb,
+                'availMem_kb': avail_kb if avail_kb != -1 else free_kb
+            }
+        if sysinfo:
+            info.update(sysinfo)
+        if rollup is not None:
+            info['pss_kb'] = rollup.get('Pss', -1)
+            info['private_dirty_kb'] = rollup.get('Private_Dirty', -1)
+        elif _HAS_PROC:
+            info['pss_kb'] = read_proc_statm(pid).get('VmRSS', -1)
+    except Exception:
+        pass
+    return info
+
+def detach_thread():
+    """Detach the calling thread from the JVM before it exits."""
+    if _HAS_JNIUS:
+        detach()
+
+# ------------------ Demo complex operation ------------------
+CHURN_N = 50000
+DEMO_CHUNK_SIZE = 100 * 1024  # 100KB
+DEMO_POOL_SIZE = 40
+PAGE_SIZE = mmap.PAGESIZE
+
+def _churn_py(n):
+    """Simulate CPU work in pure Python."""
+    s = 0
+    for i in range(n):
+        s += (i ^ (i << 1)) & 0xFF
+    return s
+
+if _HAS_NUMBA:
+    # An explicit signature compiles (or loads from cache) at import, not on the
+    # demo thread's first call where it would hold the GIL
+    _churn = njit('int64(int64)', cache=True, nogil=True)(_churn_py)
+elif _HAS_NUMPY:
+    def _xor_table(n):
+        """Precompute the per-step values summed by _churn."""
+        idx = np.arange(n)
+        return np.bitwise_and(idx ^ (idx << 1), 0xFF).astype(np.int32)
+
+    _XOR_TABLE = _xor_table(CHURN_N)
+
+    def _churn(n):
+        """Simulate CPU work with a NumPy reduction over the precomputed table."""
+        global _XOR_TABLE
+        if n > len(_XOR_TABLE):
+            _XOR_TABLE = _xor_table(n)
+        return int(_XOR_TABLE[:n].sum())
+else:
+    _churn = _churn_py
+
+def map_anonymous(size):
+    """Map an anonymous chunk; its pages stay unbacked zero pages until written."""
+    if hasattr(mmap, 'MAP_ANONYMOUS'):
+        return mmap.mmap(-1, size, mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS,
+                         mmap.PROT_READ | mmap.PROT_WRITE)
+    return mmap.mmap(-1, size)
+
+def demo_complex_operation(stop_event, duration_sec=180):
+    """A function that simulates a memory and CPU intensive task."""
+    end_time = time.time() + duration_sec
+    allocated = collections.deque()
+    try:
+        # Map the chunk pool once; nothing is resident until the loop touches it
+        try:
+            for _ in range(DEMO_POOL_SIZE):
+                allocated.append(map_anonymous(DEMO_CHUNK_SIZE))
+        except (MemoryError, OSError):
+            pass
+        resident = set()  # id()s of chunks whose pages are currently dirty
+        while time.time() < end_time and not stop_event.is_set():
+            # Touch one byte per page of the next chunks so they become resident
+            for _ in range(min(6, len(allocated))):
+                chunk = allocated[0]
+                for off in range(0, DEMO_CHUNK_SIZE, PAGE_SIZE):
+                    chunk[off] = 1
+                resident.add(id(chunk))
+                allocated.rotate(-1)
+            # Release old memory to keep usage fluctuating; the front of the
+            # deque holds the chunks touched least recently
+            if allocated and len(resident) == len(allocated) and hasattr(mmap, 'MADV_DONTNEED'):
+                for i in range(min(10, len(allocated))):
+                    allocated[i].madvise(mmap.MADV_DONTNEED)
+                    resident.discard(id(allocated[i]))
+            # Simulate CPU work
+            _churn(CHURN_N)
+            time.sleep(0.25)
+    finally:
+        for chunk in allocated:
+            chunk.close()
+        allocated = None